@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the narration rule engine. It measures the matching cost per transaction for a
+growing number of rules. Memoization is disabled, such that every narration is really scanned.
+
+Run it from the repository root with: python benchmarks/narration_rules.py
+"""
+
+import random
+import string
+import time
+
+from g2b.rules import NarrationRules
+
+RULE_COUNTS = [10, 100, 1000, 10000]
+REGEX_SHARE = 0.05
+TRANSACTIONS = 20000
+
+
+def _random_word(rnd: random.Random, length: int) -> str:
+    return "".join(rnd.choice(string.ascii_uppercase) for _ in range(length))
+
+
+def _create_rules(rnd: random.Random, count: int) -> list:
+    rules = []
+    for index in range(count):
+        merchant = _random_word(rnd, rnd.randint(5, 12))
+        if rnd.random() < REGEX_SHARE:
+            rules.append({"regex": rf"{merchant}\s*\d+", "payee": merchant, "tags": ["regex"]})
+        else:
+            rules.append({"match": merchant, "payee": merchant, "tags": [f"rule{index}"]})
+    return rules
+
+
+def _create_narrations(rnd: random.Random, rules: list) -> list:
+    narrations = []
+    for _ in range(TRANSACTIONS):
+        merchant = rnd.choice(rules).get("payee") if rnd.random() < 0.7 else "UNKNOWN"
+        narrations.append(
+            f"CARD PAYMENT {rnd.randint(1000, 9999)} {merchant} {rnd.randint(1, 99)} "
+            f"{_random_word(rnd, 8)} REF {rnd.randint(100000, 999999)}"
+        )
+    return narrations
+
+
+def main() -> None:
+    """Prints the matching time per transaction for every rule count"""
+    print(f"{'rules':>8} {'build [ms]':>12} {'per transaction [us]':>22} {'matched':>9}")
+    for rule_count in RULE_COUNTS:
+        rnd = random.Random(rule_count)
+        rules = _create_rules(rnd, rule_count)
+        narrations = _create_narrations(rnd, rules)
+        start = time.perf_counter()
+        engine = NarrationRules({"rules": rules, "cache_size": 0})
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        matched = sum(engine.match(narration) is not None for narration in narrations)
+        match_time = time.perf_counter() - start
+        print(
+            f"{rule_count:>8} {build_time * 1000:>12.1f} "
+            f"{match_time / len(narrations) * 1e6:>22.2f} {matched:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
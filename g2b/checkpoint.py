@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""This module provides checkpoints that allow to resume an interrupted conversion"""
+
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger("g2b")
+
+
+class CheckpointException(Exception):
+    """Raised if the checkpoints in a work directory can not be used"""
+
+
+class Checkpoint:
+    """
+    Stores chunks of converted transactions, together with the accumulated conversion state, in
+    a work directory. Every chunk is written atomically, such that after an interruption all
+    chunks that exist in the work directory are complete and can be loaded again.
+    """
+
+    _MANIFEST = "manifest.pickle"
+    _CHUNK_TEMPLATE = "chunk-{:06d}.pickle"
+
+    def __init__(self, work_dir: Path, fingerprint: Dict, resume: bool = False):
+        self._work_dir = Path(work_dir)
+        self._fingerprint = fingerprint
+        self._chunk_count = 0
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        if resume and (self._work_dir / self._MANIFEST).exists():
+            self._check_manifest()
+        else:
+            self._remove_files()
+            self._write_atomically(self._MANIFEST, self._fingerprint)
+
+    def load_chunks(self) -> Iterator[Any]:
+        """Yields the payloads of all complete chunks in the order they were saved"""
+        while (self._work_dir / self._CHUNK_TEMPLATE.format(self._chunk_count)).exists():
+            chunk_path = self._work_dir / self._CHUNK_TEMPLATE.format(self._chunk_count)
+            with open(chunk_path, "rb") as file:
+                payload = pickle.load(file)
+            self._chunk_count += 1
+            yield payload
+        if self._chunk_count:
+            logger.info("Resuming after %s converted chunks", self._chunk_count)
+
+    def save_chunk(self, payload: Any) -> None:
+        """Saves the payload as the next chunk"""
+        self._write_atomically(self._CHUNK_TEMPLATE.format(self._chunk_count), payload)
+        self._chunk_count += 1
+
+    def remove(self) -> None:
+        """Removes all checkpoint files and the work directory if nothing else is left in it"""
+        self._remove_files()
+        if not any(self._work_dir.iterdir()):
+            self._work_dir.rmdir()
+
+    def _check_manifest(self) -> None:
+        """Ensures that the checkpoints were created for the same book and configuration"""
+        with open(self._work_dir / self._MANIFEST, "rb") as file:
+            fingerprint = pickle.load(file)
+        if fingerprint != self._fingerprint:
+            raise CheckpointException(
+                f"Checkpoints in '{self._work_dir}' were created for a different or changed input, "
+                "configuration or chunk size and can not be resumed"
+            )
+
+    def _remove_files(self) -> None:
+        """Removes the manifest and all chunk files"""
+        for path in self._work_dir.glob("chunk-*.pickle*"):
+            path.unlink()
+        (self._work_dir / self._MANIFEST).unlink(missing_ok=True)
+
+    def _write_atomically(self, name: str, payload: Any) -> None:
+        """Pickles the payload into a temporary file which is then renamed to its final name"""
+        path = self._work_dir / name
+        partial_path = path.with_name(f"{name}.partial")
+        with open(partial_path, "wb") as file:
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(partial_path, path)
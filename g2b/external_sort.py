@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""This module provides a sorter that keeps its memory usage below a configurable budget"""
+
+import heapq
+import pickle
+import tempfile
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_memory_size(value: str) -> int:
+    """
+    Parses a memory size like '512M', '2G' or '1048576' into bytes. Raises a ValueError if the
+    value can not be interpreted.
+    """
+    value = str(value).strip().upper().removesuffix("B")
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ""
+    number = value[: len(value) - len(unit)]
+    if not number.isdigit() or int(number) <= 0:
+        raise ValueError(f"Invalid memory size: '{value}'")
+    return int(number) * _SIZE_UNITS[unit]
+
+
+class ExternalSort:
+    """
+    Sorts entries by a key. As long as no memory budget is given, or the entries fit into it,
+    everything is sorted in memory. Once the budget is exceeded the buffered entries are written
+    as a sorted run into a temporary file, and all runs are k-way merged while iterating.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None):
+        self._memory_budget = memory_budget
+        self._buffer: List[Tuple[Any, Any]] = []
+        self._buffer_size = 0
+        self._runs: List[Path] = []
+        self._work_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        if not self._runs and self._memory_budget is None:
+            return iter([entry for _, entry in sorted(self._buffer, key=itemgetter(0))])
+        if not self._runs:
+            return (entry for _, entry in self._read_buffer())
+        runs = [self._read_run(run) for run in self._runs]
+        runs.append(self._read_buffer())
+        return (entry for _, entry in heapq.merge(*runs, key=itemgetter(0)))
+
+    def add(self, key: Any, entry: Any) -> None:
+        """Adds an entry which will be ordered by the given key. Keys have to be unique."""
+        self._length += 1
+        if self._memory_budget is None:
+            self._buffer.append((key, entry))
+            return
+        record = pickle.dumps((key, entry), protocol=pickle.HIGHEST_PROTOCOL)
+        self._buffer.append((key, record))
+        self._buffer_size += len(record)
+        if self._buffer_size > self._memory_budget:
+            self._spill()
+
+    def sorted_entries(self) -> Union[List, "ExternalSort"]:
+        """
+        Returns the sorted entries as a list if they were kept in memory. Otherwise the sorter
+        itself is returned, which streams the merged runs every time it is iterated.
+        """
+        if self._runs:
+            return self
+        return list(self)
+
+    def close(self) -> None:
+        """Removes all temporary files of spilled runs"""
+        if self._work_dir is not None:
+            self._work_dir.cleanup()
+            self._work_dir = None
+        self._runs = []
+
+    def _spill(self) -> None:
+        """Writes the current buffer as a sorted run into a temporary file"""
+        if self._work_dir is None:
+            # the directory lives as long as the spilled runs and is removed by close()
+            self._work_dir = tempfile.TemporaryDirectory(  # pylint: disable=consider-using-with
+                prefix="g2b-sort-"
+            )
+        run = Path(self._work_dir.name) / f"run-{len(self._runs):05d}.pickle"
+        self._buffer.sort(key=itemgetter(0))
+        with open(run, "wb") as file:
+            for _, record in self._buffer:
+                file.write(record)
+        self._runs.append(run)
+        self._buffer = []
+        self._buffer_size = 0
+
+    def _read_buffer(self) -> Iterator[Tuple[Any, Any]]:
+        """Yields the not yet spilled entries in sorted order"""
+        for _, record in sorted(self._buffer, key=itemgetter(0)):
+            yield pickle.loads(record)
+
+    @staticmethod
+    def _read_run(run: Path) -> Iterator[Tuple[Any, Any]]:
+        """Yields the key and entry tuples of a sorted run file"""
+        with open(run, "rb") as file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""This module provides the rule engine that derives payees and tags from narrations"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+
+_TAG_PATTERN = re.compile(r"[A-Za-z0-9\-_/.]+")
+"""Characters that beancount allows in tags"""
+
+
+class RuleException(Exception):
+    """Raised if a narration rule is invalid"""
+
+
+class NarrationRule(NamedTuple):
+    """A rule that assigns a payee and tags to transactions whose narration it matches"""
+
+    payee: Optional[str]
+    tags: FrozenSet[str]
+
+
+class AhoCorasick:
+    """
+    Automaton that finds all occurrences of many literal keywords in a single pass over a text.
+    The cost of a search only depends on the length of the text and the number of occurrences,
+    not on the number of keywords.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, int]]] = [[]]
+        for index, keyword in enumerate(keywords):
+            self._add_keyword(index, keyword)
+        self._build_fail_links()
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yields the start position and the keyword index of every occurrence in the text"""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index, length in self._outputs[state]:
+                yield position - length + 1, index
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns the start position and the keyword index of the leftmost occurrence in the text.
+        If several keywords start at the same position, the one with the lowest index is returned.
+        """
+        return min(self.iter_matches(text), default=None)
+
+    def _add_keyword(self, index: int, keyword: str) -> None:
+        """Adds the keyword as a path to the trie"""
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._outputs[state].append((index, len(keyword)))
+
+    def _build_fail_links(self) -> None:
+        """Links every state to the state of its longest proper suffix in a breadth-first walk"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._outputs[next_state] = (
+                    self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                )
+
+
+class NarrationRules:  # pylint: disable=too-many-instance-attributes
+    """
+    Matches narrations against the configured rules. Literal rules are compiled into an
+    Aho-Corasick automaton. Regex rules that start with a literal prefix add this prefix to the
+    automaton as well, and are only tried at the positions where their prefix occurs. All other
+    regex rules are merged into one alternation. Like that every narration is scanned once by the
+    automaton and at most once by the alternation, independent of the number of rules.
+    Regex rules that would behave differently inside the alternation, because they use named
+    groups, group references or global inline flags, are searched on their own.
+    The rule that matches at the leftmost position of the narration wins, ties are resolved by the
+    order of the rules in the configuration. Results are memoized, as the same descriptions
+    usually occur many times in a book.
+    """
+
+    _MIN_PREFIX_LENGTH = 3
+    """Minimal length of a literal regex prefix that is used to select candidate positions"""
+
+    _NOT_COMBINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)")
+    """Group references and global inline flags, which break if a regex is merged with others"""
+
+    def __init__(self, config: Dict):
+        self._flags = re.IGNORECASE if config.get("ignore_case", True) else 0
+        self._rules: List[NarrationRule] = []
+        keywords: List[str] = []
+        self._keyword_rules: List[Tuple[int, Optional[re.Pattern]]] = []
+        alternatives: List[str] = []
+        self._alternative_rules: List[int] = []
+        self._separate_rules: List[Tuple[int, re.Pattern]] = []
+        for index, rule_config in enumerate(config.get("rules", [])):
+            self._rules.append(
+                NarrationRule(payee=rule_config.get("payee"), tags=self._parse_tags(rule_config))
+            )
+            if "match" in rule_config:
+                if not str(rule_config["match"]):
+                    raise RuleException(f"Rule with an empty 'match': {rule_config}")
+                keywords.append(self._normalize(str(rule_config["match"])))
+                self._keyword_rules.append((index, None))
+            elif "regex" in rule_config:
+                pattern = self._compile(rule_config["regex"])
+                prefix = self._literal_prefix(rule_config["regex"])
+                if len(prefix) >= self._MIN_PREFIX_LENGTH:
+                    keywords.append(self._normalize(prefix))
+                    self._keyword_rules.append((index, pattern))
+                elif not self._is_combinable(pattern):
+                    self._separate_rules.append((index, pattern))
+                else:
+                    alternatives.append(f"(?P<rule{len(alternatives)}>{rule_config['regex']})")
+                    self._alternative_rules.append(index)
+            else:
+                raise RuleException(f"Rule needs either 'match' or 'regex': {rule_config}")
+        self._automaton = AhoCorasick(keywords) if keywords else None
+        try:
+            self._alternation = (
+                re.compile("|".join(alternatives), self._flags) if alternatives else None
+            )
+        except re.error as error:
+            raise RuleException(f"Regex rules can not be combined: {error}") from error
+        self.match = lru_cache(maxsize=config.get("cache_size", 65536))(self._match)
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def _match(self, narration: str) -> Optional[NarrationRule]:
+        """Returns the winning rule for the narration, or None if no rule matches"""
+        best = None
+        if self._automaton is not None:
+            text = self._normalize(narration)
+            # lower casing can change the length, then the positions are mapped back
+            offsets = self._original_offsets(narration) if len(text) != len(narration) else None
+            for start, keyword in self._automaton.iter_matches(text):
+                start = offsets[start] if offsets is not None else start
+                rule, pattern = self._keyword_rules[keyword]
+                if best is not None and (start, rule) > best:
+                    continue
+                if pattern is None or pattern.match(narration, start):
+                    best = (start, rule)
+        if self._alternation is not None:
+            found = self._alternation.search(narration)
+            if found is not None:
+                rule = self._alternative_rules[int(found.lastgroup.removeprefix("rule"))]
+                candidate = (found.start(), rule)
+                best = candidate if best is None else min(best, candidate)
+        for rule, pattern in self._separate_rules:
+            found = pattern.search(narration)
+            if found is not None:
+                candidate = (found.start(), rule)
+                best = candidate if best is None else min(best, candidate)
+        return self._rules[best[1]] if best is not None else None
+
+    @staticmethod
+    def _parse_tags(rule_config: Dict) -> FrozenSet[str]:
+        """Returns the tags of a rule and ensures that all of them are valid beancount tags"""
+        tags = frozenset(str(tag) for tag in rule_config.get("tags", []))
+        for tag in tags:
+            if not _TAG_PATTERN.fullmatch(tag):
+                raise RuleException(
+                    f"Invalid tag '{tag}' in rule, only letters, digits and '-_/.' are allowed"
+                )
+        return tags
+
+    @staticmethod
+    def _original_offsets(text: str) -> List[int]:
+        """Returns the position in the text of every character of the lower cased text"""
+        return [position for position, char in enumerate(text) for _ in char.lower()]
+
+    def _normalize(self, text: str) -> str:
+        """Lower cases the text if the rules should ignore the case"""
+        return text.lower() if self._flags & re.IGNORECASE else text
+
+    def _compile(self, pattern: str) -> re.Pattern:
+        """Compiles a regex rule"""
+        try:
+            return re.compile(pattern, self._flags)
+        except re.error as error:
+            raise RuleException(f"Invalid regex in rule: '{pattern}'") from error
+
+    def _is_combinable(self, pattern: re.Pattern) -> bool:
+        """Returns True if the regex can be merged into the alternation of all regex rules"""
+        return not pattern.groupindex and not self._NOT_COMBINABLE.search(pattern.pattern)
+
+    @staticmethod
+    def _literal_prefix(pattern: str) -> str:
+        """
+        Returns the literal characters every match of the pattern starts with. The prefix ends at
+        the first special character, and a character followed by a quantifier is not part of it.
+        Patterns with alternations do not have a prefix.
+        """
+        if "|" in pattern:
+            return ""
+        prefix = re.match(r"[\w \-,/&']*", pattern).group()
+        if pattern[len(prefix) : len(prefix) + 1] in ("?", "*", "{"):
+            prefix = prefix[:-1]
+        return prefix
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""This module maps gnucash key value slots onto beancount metadata, tags and links"""
+
+import datetime
+import logging
+import re
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional
+
+from sqlalchemy import column, select, table
+
+logger = logging.getLogger("g2b")
+
+_SLOTS_TABLE = table(
+    "slots",
+    column("obj_guid"),
+    column("name"),
+    column("slot_type"),
+    column("int64_val"),
+    column("string_val"),
+    column("double_val"),
+    column("timespec_val"),
+    column("guid_val"),
+    column("numeric_val_num"),
+    column("numeric_val_denom"),
+    column("gdate_val"),
+)
+
+
+class SlotException(Exception):
+    """Raised if the slot mapping is invalid"""
+
+
+class SlotTarget(NamedTuple):
+    """Describes where the value of a slot ends up in the beancount ledger"""
+
+    kind: str
+    key: Optional[str] = None
+
+
+class SlotEntries(NamedTuple):
+    """Metadata, tags and links that are derived from the slots of one gnucash object"""
+
+    meta: Dict[str, Any]
+    tags: FrozenSet[str]
+    links: FrozenSet[str]
+
+
+_EMPTY_ENTRIES = SlotEntries(meta={}, tags=frozenset(), links=frozenset())
+
+
+class SlotMapping:
+    """
+    Maps the slots of transactions, splits and accounts onto beancount metadata, tags and links.
+    Instead of lazily querying the slots of every object, all slots with a configured name are
+    loaded in a single query and joined to their objects by GUID. Like that the number of database
+    round-trips stays the same, independent of the size of the book.
+    """
+
+    OBJECT_TYPES = ("transactions", "splits", "accounts")
+    """Gnucash objects whose slots can be mapped"""
+
+    _TARGET_KINDS = {
+        "transactions": ("meta", "tag", "link"),
+        "splits": ("meta",),
+        "accounts": ("meta",),
+    }
+    """Targets that are supported for every object type"""
+
+    _RESERVED_KEYS = ("filename", "lineno")
+    """Metadata keys that beancount sets itself"""
+
+    def __init__(self, config: Dict):
+        self._targets: Dict[str, Dict[str, SlotTarget]] = {}
+        for object_type, slot_configs in config.items():
+            if object_type not in self.OBJECT_TYPES:
+                raise SlotException(f"Unknown object type in slot configuration: '{object_type}'")
+            self._targets[object_type] = {
+                str(name): self._parse_target(object_type, str(name), str(target))
+                for name, target in (slot_configs or {}).items()
+            }
+        self._values: Dict[str, Dict[str, Any]] = {}
+
+    def __bool__(self) -> bool:
+        return any(self._targets.values())
+
+    def maps(self, object_type: str) -> bool:
+        """Returns True if any slot of the given object type is mapped"""
+        return bool(self._targets.get(object_type))
+
+    def load(self, session) -> None:
+        """Loads the values of all mapped slots in a single query"""
+        names = {name for targets in self._targets.values() for name in targets}
+        query = select(_SLOTS_TABLE).where(_SLOTS_TABLE.c.name.in_(sorted(names)))
+        result = session.execute(query.execution_options(stream_results=True))
+        count = 0
+        for row in result:
+            value = self._convert_value(row)
+            if value is not None:
+                self._values.setdefault(row.obj_guid, {})[row.name] = value
+                count += 1
+        logger.debug("Loaded %s slot values", count)
+
+    def entries(
+        self, object_type: str, guid: str, columns: Optional[Dict[str, Any]] = None
+    ) -> SlotEntries:
+        """
+        Returns the metadata, tags and links of the object with the given GUID. Besides slots,
+        columns of the object can be given, which are mapped the same way as slots of that name.
+        """
+        targets = self._targets.get(object_type)
+        if not targets:
+            return _EMPTY_ENTRIES
+        values = self._values.get(guid, {})
+        if columns:
+            values = {**values, **columns}
+        meta, tags, links = {}, set(), set()
+        for name, target in targets.items():
+            value = values.get(name)
+            if value is None or value == "":
+                continue
+            if target.kind == "meta":
+                meta[target.key] = value
+                continue
+            reference = self._sanitize_reference(value)
+            if reference:
+                (tags if target.kind == "tag" else links).add(reference)
+        return SlotEntries(meta=meta, tags=frozenset(tags), links=frozenset(links))
+
+    def _parse_target(self, object_type: str, name: str, target: str) -> SlotTarget:
+        """Parses a target like 'meta', 'meta:<key>', 'tag' or 'link'"""
+        if "/" in name:
+            raise SlotException(
+                f"Slot '{name}' is part of a frame, only top level slots can be mapped"
+            )
+        kind, _, key = target.partition(":")
+        if kind not in self._TARGET_KINDS[object_type]:
+            raise SlotException(
+                f"Slot '{name}' of {object_type} can only be mapped to "
+                f"{', '.join(self._TARGET_KINDS[object_type])}, not to '{target}'"
+            )
+        if kind != "meta":
+            return SlotTarget(kind=kind)
+        key = key or re.sub(r"[^\w-]", "-", name)
+        if not re.fullmatch(r"[a-z][a-zA-Z0-9\-_]*", key):
+            raise SlotException(f"Slot '{name}' needs a valid metadata key, got '{key}'")
+        if key in self._RESERVED_KEYS:
+            raise SlotException(f"Slot '{name}' can not be mapped to the reserved key '{key}'")
+        return SlotTarget(kind=kind, key=key)
+
+    @staticmethod
+    def _convert_value(row) -> Any:
+        """Converts a slot row into a beancount metadata value, frames and lists are skipped"""
+        # pylint: disable=too-many-return-statements
+        if row.slot_type == 1:
+            return Decimal(row.int64_val)
+        if row.slot_type == 2:
+            return Decimal(repr(row.double_val))
+        if row.slot_type == 3:
+            return Decimal(row.numeric_val_num) / Decimal(row.numeric_val_denom)
+        if row.slot_type == 4:
+            return row.string_val
+        if row.slot_type == 5:
+            return row.guid_val
+        if row.slot_type == 6:
+            return _to_date(row.timespec_val)
+        if row.slot_type == 10:
+            return _to_date(row.gdate_val)
+        return None
+
+    @staticmethod
+    def _sanitize_reference(value: Any) -> str:
+        """Replaces characters that are not allowed in beancount tags and links"""
+        if isinstance(value, datetime.date):
+            value = value.isoformat()
+        return re.sub(r"[^A-Za-z0-9\-_/.]+", "-", str(value)).strip("-")
+
+
+def _to_date(value: Any) -> Optional[datetime.date]:
+    """Converts a date column into a date. Sqlite stores them as strings, other databases not."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if value is None or isinstance(value, datetime.date):
+        return value
+    digits = re.sub(r"\D", "", str(value))[:8]
+    return datetime.datetime.strptime(digits, "%Y%m%d").date() if len(digits) == 8 else None
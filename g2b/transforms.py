@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""This module provides the stage that applies user defined hooks to converted transactions"""
+
+import importlib
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from beancount.core import data
+
+logger = logging.getLogger("g2b")
+
+
+class TransformException(Exception):
+    """Raised if a transformation hook can not be loaded or returns an invalid batch"""
+
+
+def load_hook(name: str) -> Callable:
+    """Imports a hook given as 'package.module:function' or 'package.module.function'"""
+    module_name, _, function_name = name.replace(":", ".").rpartition(".")
+    try:
+        hook = getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError, ValueError) as error:
+        raise TransformException(f"Could not load transformation hook '{name}'") from error
+    if not callable(hook):
+        raise TransformException(f"Transformation hook '{name}' is not callable")
+    return hook
+
+
+def apply_hook(
+    name: str, options: Dict, transactions: List[data.Transaction]
+) -> List[Optional[data.Transaction]]:
+    """
+    Applies a hook to a batch of transactions. A hook receives the list of transactions plus its
+    configured options as keyword arguments, and returns a list of the same length. Every returned
+    transaction replaces the one at the same position, None removes it from the ledger.
+    """
+    transformed = load_hook(name)(transactions, **options)
+    if transformed is None or len(transformed) != len(transactions):
+        raise TransformException(
+            f"Transformation hook '{name}' has to return a list with one entry per transaction"
+        )
+    return list(transformed)
+
+
+class TransformPipeline:
+    """
+    Applies the configured hooks, in their configured order, to batches of converted
+    transactions. Hooks that are declared as pure only depend on their input, such that several
+    batches can be processed by them at once in parallel worker processes. All other hooks are
+    called in the converting process. The time spent in every hook is collected and can be logged.
+    """
+
+    def __init__(self, config: Dict):
+        self.batch_size = int(config.get("batch_size", 1000))
+        self._workers = config.get("workers") or os.cpu_count() or 1
+        self._hooks = []
+        for hook_config in config.get("hooks", []):
+            name = hook_config.get("function")
+            if name is None:
+                raise TransformException(f"Missing 'function' in hook configuration: {hook_config}")
+            load_hook(name)
+            self._hooks.append((name, hook_config.get("options", {}), hook_config.get("pure")))
+        self._executor = None
+        self._durations = defaultdict(float)
+        self._counts = defaultdict(int)
+
+    def __bool__(self) -> bool:
+        return bool(self._hooks)
+
+    @property
+    def buffer_size(self) -> int:
+        """Returns the number of transactions that should be collected before calling run"""
+        if not self._hooks:
+            return 1
+        if any(pure for _, _, pure in self._hooks):
+            return self.batch_size * self._workers
+        return self.batch_size
+
+    def run(self, batches: List[List[data.Transaction]]) -> List[List[Optional[data.Transaction]]]:
+        """
+        Applies all hooks to every batch. The returned batches keep the positions of the given
+        transactions, with None for every transaction that was removed by a hook.
+        """
+        results = [list(batch) for batch in batches]
+        for name, options, pure in self._hooks:
+            positions = [[i for i, txn in enumerate(batch) if txn is not None] for batch in results]
+            inputs = [[batch[i] for i in indices] for batch, indices in zip(results, positions)]
+            start = time.perf_counter()
+            outputs = self._apply(name, options, pure, inputs)
+            self._durations[name] += time.perf_counter() - start
+            self._counts[name] += sum(len(batch) for batch in inputs)
+            for batch, indices, output in zip(results, positions, outputs):
+                for index, transaction in zip(indices, output):
+                    batch[index] = transaction
+        return results
+
+    def log_timings(self) -> None:
+        """Logs the number of processed transactions and the time spent in every hook"""
+        for name, _, _ in self._hooks:
+            logger.info(
+                "Transformation hook '%s' processed %s transactions in %.3fs",
+                name,
+                self._counts[name],
+                self._durations[name],
+            )
+
+    def close(self) -> None:
+        """Shuts down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _apply(self, name: str, options: Dict, pure: bool, batches: List) -> List:
+        """Applies one hook to all batches, in parallel worker processes if the hook is pure"""
+        hook = partial(apply_hook, name, options)
+        if not pure or len(batches) < 2:
+            return [hook(batch) for batch in batches]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        return list(self._executor.map(hook, batches))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=attribute-defined-outside-init
+import pytest
+
+from g2b.checkpoint import Checkpoint, CheckpointException
+
+
+class TestCheckpoint:
+
+    def setup_method(self):
+        self.fingerprint = {"input": "book.gnucash", "config": "abc", "checkpoint_size": 2}
+
+    def test_load_chunks_returns_saved_chunks_in_order(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path, self.fingerprint)
+        checkpoint.save_chunk({"rows": 2})
+        checkpoint.save_chunk({"rows": 1})
+        resumed = Checkpoint(tmp_path, self.fingerprint, resume=True)
+        assert list(resumed.load_chunks()) == [{"rows": 2}, {"rows": 1}]
+
+    def test_save_chunk_after_resume_continues_numbering(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path, self.fingerprint)
+        checkpoint.save_chunk(1)
+        resumed = Checkpoint(tmp_path, self.fingerprint, resume=True)
+        assert list(resumed.load_chunks()) == [1]
+        resumed.save_chunk(2)
+        assert list(Checkpoint(tmp_path, self.fingerprint, resume=True).load_chunks()) == [1, 2]
+
+    def test_load_chunks_ignores_partially_written_chunks(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path, self.fingerprint)
+        checkpoint.save_chunk(1)
+        (tmp_path / "chunk-000001.pickle.partial").write_bytes(b"incomplete")
+        resumed = Checkpoint(tmp_path, self.fingerprint, resume=True)
+        assert list(resumed.load_chunks()) == [1]
+
+    def test_new_checkpoint_without_resume_discards_existing_chunks(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path, self.fingerprint)
+        checkpoint.save_chunk(1)
+        restarted = Checkpoint(tmp_path, self.fingerprint)
+        assert not list(restarted.load_chunks())
+
+    def test_resume_raises_on_different_fingerprint(self, tmp_path):
+        Checkpoint(tmp_path, self.fingerprint).save_chunk(1)
+        self.fingerprint["config"] = "changed"
+        with pytest.raises(CheckpointException, match="can not be resumed"):
+            Checkpoint(tmp_path, self.fingerprint, resume=True)
+
+    def test_remove_deletes_checkpoint_files_and_empty_work_dir(self, tmp_path):
+        work_dir = tmp_path / "work"
+        checkpoint = Checkpoint(work_dir, self.fingerprint)
+        checkpoint.save_chunk(1)
+        checkpoint.remove()
+        assert not work_dir.exists()
+
+    def test_remove_keeps_work_dir_with_foreign_files(self, tmp_path):
+        (tmp_path / "notes.txt").write_text("keep me")
+        checkpoint = Checkpoint(tmp_path, self.fingerprint)
+        checkpoint.save_chunk(1)
+        checkpoint.remove()
+        assert [path.name for path in tmp_path.iterdir()] == ["notes.txt"]
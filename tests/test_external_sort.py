@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=protected-access
+import random
+
+import pytest
+
+from g2b.external_sort import ExternalSort, parse_memory_size
+
+
+class TestParseMemorySize:
+
+    @pytest.mark.parametrize(
+        "value, expected_size",
+        [
+            ("1024", 1024),
+            ("4K", 4 * 1024),
+            ("512M", 512 * 1024**2),
+            ("512mb", 512 * 1024**2),
+            ("2G", 2 * 1024**3),
+        ],
+    )
+    def test_parse_memory_size_returns_bytes(self, value, expected_size):
+        assert parse_memory_size(value) == expected_size
+
+    @pytest.mark.parametrize("value", ["", "0", "-5M", "1.5G", "12T", "much"])
+    def test_parse_memory_size_raises_on_invalid_values(self, value):
+        with pytest.raises(ValueError, match="Invalid memory size"):
+            parse_memory_size(value)
+
+
+class TestExternalSort:
+
+    def setup_method(self):
+        self.keys = list(range(1000))
+        random.Random(42).shuffle(self.keys)
+
+    def test_sorted_entries_returns_list_if_no_budget_is_given(self):
+        sorter = ExternalSort()
+        for key in self.keys:
+            sorter.add(key, f"entry-{key}")
+        entries = sorter.sorted_entries()
+        assert isinstance(entries, list)
+        assert entries == [f"entry-{key}" for key in range(1000)]
+        assert not sorter._runs
+
+    def test_sorted_entries_merges_spilled_runs_if_budget_is_exceeded(self):
+        sorter = ExternalSort(memory_budget=1024)
+        for key in self.keys:
+            sorter.add(key, f"entry-{key}")
+        entries = sorter.sorted_entries()
+        assert entries is sorter
+        assert len(sorter._runs) > 1
+        assert len(entries) == 1000
+        assert list(entries) == [f"entry-{key}" for key in range(1000)]
+        assert list(entries) == [f"entry-{key}" for key in range(1000)]
+
+    def test_sorted_entries_returns_list_if_budget_is_not_exceeded(self):
+        sorter = ExternalSort(memory_budget=1024**3)
+        for key in self.keys:
+            sorter.add(key, f"entry-{key}")
+        entries = sorter.sorted_entries()
+        assert not sorter._runs
+        assert entries == [f"entry-{key}" for key in range(1000)]
+
+    def test_sorted_entries_orders_by_tuple_keys(self):
+        sorter = ExternalSort(memory_budget=1)
+        sorter.add(("2024-01-02", "b"), "third")
+        sorter.add(("2024-01-01", "b"), "second")
+        sorter.add(("2024-01-01", "a"), "first")
+        assert list(sorter.sorted_entries()) == ["first", "second", "third"]
+
+    def test_close_removes_spilled_runs(self):
+        sorter = ExternalSort(memory_budget=1)
+        for key in self.keys[:10]:
+            sorter.add(key, key)
+        runs = list(sorter._runs)
+        assert all(run.exists() for run in runs)
+        sorter.close()
+        assert not any(run.exists() for run in runs)
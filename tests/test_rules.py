@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=protected-access
+from unittest import mock
+
+import pytest
+
+from g2b.rules import AhoCorasick, NarrationRule, NarrationRules, RuleException
+
+
+class TestAhoCorasick:
+
+    @pytest.mark.parametrize(
+        "keywords, text, expected",
+        [
+            (["he", "she", "his", "hers"], "ushers", (1, 1)),
+            (["hers", "he"], "ushers", (2, 0)),
+            (["abc"], "xyz", None),
+            (["a", "ab", "bab"], "xbab", (1, 2)),
+            (["aa"], "aaaa", (0, 0)),
+        ],
+    )
+    def test_search_returns_leftmost_occurrence(self, keywords, text, expected):
+        assert AhoCorasick(keywords).search(text) == expected
+
+    def test_iter_matches_yields_all_occurrences(self):
+        matches = sorted(AhoCorasick(["he", "she", "hers"]).iter_matches("ushers"))
+        assert matches == [(1, 1), (2, 0), (2, 2)]
+
+
+class TestNarrationRules:
+
+    def setup_method(self):
+        self.config = {
+            "rules": [
+                {"match": "Amazon", "payee": "Amazon", "tags": ["shopping"]},
+                {"match": "Marketplace", "payee": "Marketplace"},
+                {"regex": r"REWE\s*\d+", "payee": "REWE", "tags": ["groceries"]},
+                {"regex": r"^(Salary|Wage)", "payee": "Employer", "tags": ["income"]},
+            ]
+        }
+
+    @pytest.mark.parametrize(
+        "narration, payee, tags",
+        [
+            ("CARD AMAZON MARKETPLACE", "Amazon", {"shopping"}),
+            ("CARD MARKETPLACE AMAZON", "Marketplace", set()),
+            ("rewe 1234 Berlin", "REWE", {"groceries"}),
+            ("salary May", "Employer", {"income"}),
+        ],
+    )
+    def test_match_returns_leftmost_matching_rule(self, narration, payee, tags):
+        rule = NarrationRules(self.config).match(narration)
+        assert rule == NarrationRule(payee=payee, tags=frozenset(tags))
+
+    @pytest.mark.parametrize("narration", ["REWE Berlin", "Monthly salary", "Unknown shop"])
+    def test_match_returns_none_if_no_rule_matches(self, narration):
+        assert NarrationRules(self.config).match(narration) is None
+
+    def test_match_resolves_ties_by_rule_order(self):
+        self.config["rules"].insert(0, {"regex": r"amazon\w*", "payee": "Regex Amazon"})
+        assert NarrationRules(self.config).match("AMAZON.DE").payee == "Regex Amazon"
+
+    def test_match_respects_case_if_configured(self):
+        self.config["ignore_case"] = False
+        rules = NarrationRules(self.config)
+        assert rules.match("amazon") is None
+        assert rules.match("Amazon").payee == "Amazon"
+
+    def test_match_maps_positions_back_if_lower_casing_changes_the_length(self):
+        self.config["rules"].append({"regex": r"Straße\d", "payee": "Street"})
+        rules = NarrationRules(self.config)
+        assert rules.match("İSTRASSE STRAßE1").payee == "Street"
+        assert rules.match("İİ STRAßE1 AMAZON").payee == "Street"
+
+    def test_match_memoizes_repeated_narrations(self):
+        rules = NarrationRules(self.config)
+        rules.match("CARD AMAZON")
+        rules.match("CARD AMAZON")
+        assert rules.match.cache_info().hits == 1
+
+    @pytest.mark.parametrize(
+        "rules, narration, payee",
+        [
+            ([r"(?P<shop>REWE)\s\d", r"(?P<shop>EDEKA)\s\d"], "CARD EDEKA 12", "1"),
+            ([r"^\d", r"^(b)\1"], "bb", "1"),
+            ([r"^\d", r"^(?P<x>b)(?P=x)"], "bb", "1"),
+            ([r"^\d", r"(?i)^ABC"], "abc", "1"),
+            ([r"^\d", r"^(?:(a)|b)(?(1)c|d)"], "bd", "1"),
+        ],
+    )
+    def test_match_searches_regexes_separately_if_they_can_not_be_combined(
+        self, rules, narration, payee
+    ):
+        rules = [{"regex": regex, "payee": str(index)} for index, regex in enumerate(rules)]
+        assert (
+            NarrationRules({"rules": rules, "ignore_case": False}).match(narration).payee == payee
+        )
+
+    def test_init_raises_if_regexes_can_not_be_combined(self):
+        rules = [{"regex": r"^(?P<shop>REWE)"}, {"regex": r"^(?P<shop>EDEKA)"}]
+        with mock.patch.object(NarrationRules, "_is_combinable", return_value=True):
+            with pytest.raises(RuleException, match="can not be combined"):
+                NarrationRules({"rules": rules})
+
+    @pytest.mark.parametrize(
+        "pattern, prefix",
+        [
+            (r"REWE\s*\d+", "REWE"),
+            (r"Shops?", "Shop"),
+            (r"ab{2}", "a"),
+            (r"^REWE", ""),
+            (r"REWE|EDEKA", ""),
+        ],
+    )
+    def test_literal_prefix_ends_before_special_characters(self, pattern, prefix):
+        assert NarrationRules._literal_prefix(pattern) == prefix
+
+    @pytest.mark.parametrize(
+        "rule, message",
+        [
+            ({"payee": "Nothing"}, "either 'match' or 'regex'"),
+            ({"match": ""}, "empty 'match'"),
+            ({"regex": "(unclosed"}, "Invalid regex"),
+            ({"match": "REWE", "tags": ["my food"]}, "Invalid tag 'my food'"),
+            ({"match": "REWE", "tags": ["#food"]}, "Invalid tag '#food'"),
+        ],
+    )
+    def test_init_raises_on_invalid_rules(self, rule, message):
+        with pytest.raises(RuleException, match=message):
+            NarrationRules({"rules": [rule]})
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+import piecash
+import pytest
+from sqlalchemy import event
+
+from g2b.slots import SlotEntries, SlotException, SlotMapping, SlotTarget
+
+
+def _slot_row(slot_type, **values):
+    columns = {
+        "obj_guid": "guid",
+        "name": "name",
+        "int64_val": None,
+        "string_val": None,
+        "double_val": None,
+        "timespec_val": None,
+        "guid_val": None,
+        "numeric_val_num": None,
+        "numeric_val_denom": None,
+        "gdate_val": None,
+    }
+    return SimpleNamespace(**{**columns, "slot_type": slot_type, **values})
+
+
+class TestSlotMapping:
+
+    @pytest.mark.parametrize(
+        "name, target, expected",
+        [
+            ("notes", "meta", SlotTarget(kind="meta", key="notes")),
+            ("online_id", "meta:fitid", SlotTarget(kind="meta", key="fitid")),
+            ("date-posted", "meta", SlotTarget(kind="meta", key="date-posted")),
+            ("assoc_uri", "link", SlotTarget(kind="link")),
+            ("notes", "tag", SlotTarget(kind="tag")),
+        ],
+    )
+    def test_parse_target_returns_kind_and_key(self, name, target, expected):
+        assert SlotMapping({})._parse_target("transactions", name, target) == expected
+
+    @pytest.mark.parametrize(
+        "config, message",
+        [
+            ({"books": {"notes": "meta"}}, "Unknown object type"),
+            ({"accounts": {"notes": "link"}}, "can only be mapped to meta"),
+            ({"transactions": {"notes": "label"}}, "can only be mapped to meta, tag, link"),
+            ({"transactions": {"Tax Number": "meta"}}, "needs a valid metadata key"),
+            ({"transactions": {"notes": "meta:Notes"}}, "needs a valid metadata key"),
+            ({"transactions": {"notes": "meta:filename"}}, "reserved key 'filename'"),
+            ({"accounts": {"lineno": "meta"}}, "reserved key 'lineno'"),
+            ({"transactions": {"hbci/trans-ident": "meta"}}, "is part of a frame"),
+        ],
+    )
+    def test_init_raises_on_invalid_configuration(self, config, message):
+        with pytest.raises(SlotException, match=message):
+            SlotMapping(config)
+
+    @pytest.mark.parametrize(
+        "row, expected",
+        [
+            (_slot_row(1, int64_val=7), Decimal("7")),
+            (_slot_row(2, double_val=0.1), Decimal("0.1")),
+            (_slot_row(3, numeric_val_num=1234, numeric_val_denom=100), Decimal("12.34")),
+            (_slot_row(4, string_val="text"), "text"),
+            (_slot_row(5, guid_val="abc"), "abc"),
+            (_slot_row(6, timespec_val="2024-05-01 10:00:00"), datetime.date(2024, 5, 1)),
+            (_slot_row(10, gdate_val="20240501"), datetime.date(2024, 5, 1)),
+            (_slot_row(10, gdate_val=datetime.date(2024, 5, 1)), datetime.date(2024, 5, 1)),
+            (_slot_row(9), None),
+        ],
+    )
+    def test_convert_value_returns_beancount_metadata_values(self, row, expected):
+        assert SlotMapping._convert_value(row) == expected
+
+    def test_entries_maps_slots_and_columns_of_an_object(self):
+        slot_mapping = SlotMapping(
+            {"transactions": {"notes": "meta", "num": "meta:number", "online_id": "tag"}}
+        )
+        slot_mapping._values = {"guid": {"notes": "Note", "online_id": "FIT 1"}}
+        assert slot_mapping.entries("transactions", "guid", {"num": "7"}) == SlotEntries(
+            meta={"notes": "Note", "number": "7"}, tags=frozenset({"FIT-1"}), links=frozenset()
+        )
+
+    def test_entries_skips_missing_and_empty_values(self):
+        slot_mapping = SlotMapping({"transactions": {"notes": "meta", "num": "link"}})
+        slot_mapping._values = {"guid": {"notes": ""}}
+        assert slot_mapping.entries("transactions", "guid", {"num": "!?"}) == SlotEntries(
+            meta={}, tags=frozenset(), links=frozenset()
+        )
+        assert slot_mapping.entries("splits", "guid").meta == {}
+
+    def test_load_reads_all_mapped_slots_in_a_single_query(self):
+        slot_mapping = SlotMapping(
+            {"transactions": {"date-posted": "meta"}, "accounts": {"notes": "meta"}}
+        )
+        book = piecash.open_book("tests/test_book.gnucash", readonly=True, open_if_lock=True)
+        statements = mock.MagicMock()
+        event.listen(book.session.bind, "before_cursor_execute", statements)
+        try:
+            slot_mapping.load(book.session)
+        finally:
+            event.remove(book.session.bind, "before_cursor_execute", statements)
+            book.close()
+        assert statements.call_count == 1
+        assert len(slot_mapping._values) == 5
+        assert slot_mapping.entries("accounts", "97c435ffc42f41a78365515580566f8d").meta == {
+            "notes": "Create subaccounts for each used type, if desired."
+        }
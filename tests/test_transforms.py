@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+import datetime
+
+import pytest
+from beancount.core import data
+
+from g2b.transforms import TransformException, TransformPipeline, load_hook
+
+
+def set_payee(transactions, payee="Shop"):
+    return [transaction._replace(payee=payee) for transaction in transactions]
+
+
+def drop_groceries(transactions):
+    return [None if txn.narration == "Groceries" else txn for txn in transactions]
+
+
+def add_tag(transactions, tag):
+    return [txn._replace(tags=txn.tags | {tag}) for txn in transactions]
+
+
+def move_to_date(transactions, narration, date):
+    return [txn._replace(date=date) if txn.narration == narration else txn for txn in transactions]
+
+
+def drop_everything(_):
+    return []
+
+
+def create_transaction(narration):
+    return data.Transaction(
+        meta={},
+        date=datetime.date(2024, 5, 1),
+        flag="*",
+        payee="",
+        narration=narration,
+        tags=frozenset(),
+        links=set(),
+        postings=[],
+    )
+
+
+class TestLoadHook:
+
+    @pytest.mark.parametrize(
+        "name", ["tests.test_transforms:set_payee", "tests.test_transforms.set_payee"]
+    )
+    def test_load_hook_imports_function(self, name):
+        assert load_hook(name) is set_payee
+
+    @pytest.mark.parametrize(
+        "name", ["tests.test_transforms:unknown", "unknown_module.hook", "set_payee"]
+    )
+    def test_load_hook_raises_on_unknown_hook(self, name):
+        with pytest.raises(TransformException, match="Could not load transformation hook"):
+            load_hook(name)
+
+
+class TestTransformPipeline:
+
+    def test_pipeline_without_hooks_is_falsy(self):
+        pipeline = TransformPipeline({})
+        assert not pipeline
+        assert pipeline.buffer_size == 1
+
+    def test_pipeline_raises_on_hook_without_function(self):
+        with pytest.raises(TransformException, match="Missing 'function'"):
+            TransformPipeline({"hooks": [{"pure": True}]})
+
+    def test_run_applies_hooks_in_order_and_keeps_positions(self):
+        pipeline = TransformPipeline(
+            {
+                "hooks": [
+                    {"function": "tests.test_transforms:drop_groceries"},
+                    {"function": "tests.test_transforms:set_payee", "options": {"payee": "Bob"}},
+                ]
+            }
+        )
+        batches = [[create_transaction("Groceries"), create_transaction("Rent")]]
+        transformed = pipeline.run(batches)
+        assert transformed[0][0] is None
+        assert transformed[0][1].payee == "Bob"
+        assert pipeline._counts == {
+            "tests.test_transforms:drop_groceries": 2,
+            "tests.test_transforms:set_payee": 1,
+        }
+
+    def test_run_applies_pure_hooks_in_worker_processes(self):
+        pipeline = TransformPipeline(
+            {
+                "batch_size": 2,
+                "workers": 2,
+                "hooks": [
+                    {
+                        "function": "tests.test_transforms:add_tag",
+                        "pure": True,
+                        "options": {"tag": "imported"},
+                    }
+                ],
+            }
+        )
+        assert pipeline.buffer_size == 4
+        batches = [[create_transaction(f"{i}-{j}") for j in range(2)] for i in range(3)]
+        try:
+            transformed = pipeline.run(batches)
+            assert pipeline._executor is not None
+        finally:
+            pipeline.close()
+        assert [[txn.narration for txn in batch] for batch in transformed] == [
+            [txn.narration for txn in batch] for batch in batches
+        ]
+        assert all(txn.tags == {"imported"} for batch in transformed for txn in batch)
+
+    def test_run_raises_if_hook_changes_batch_length(self):
+        pipeline = TransformPipeline(
+            {"hooks": [{"function": "tests.test_transforms:drop_everything"}]}
+        )
+        with pytest.raises(TransformException, match="one entry per transaction"):
+            pipeline.run([[create_transaction("Rent")]])